@@ -1,8 +1,24 @@
 # Gemini生成のjsonlファイルを有効なjsonlファイルに変換するスクリプト
 
+import codecs
 import json
 from pathlib import Path
 
+# 検証用パーサーは速い順に simdjson → orjson → 標準json を利用する
+try:
+    import simdjson
+except ImportError:
+    simdjson = None
+
+try:
+    import orjson
+except ImportError:
+    orjson = None
+
+if simdjson is None and orjson is None:
+    print("警告: simdjson / orjsonライブラリがインストールされていません。標準のjsonモジュールを使用します。")
+    print("インストールするには: pip install pysimdjson または pip install orjson")
+
 def make_valid_jsonl(
     input_path: str,
     output_path: str,
@@ -14,23 +30,62 @@ def make_valid_jsonl(
     valid = 0
     invalid = 0
 
-    with in_path.open("r", encoding=encoding) as fin, \
-         out_path.open("w", encoding=encoding) as fout:
+    # パースは検証のためだけに行い、有効な行は元のバイト列をそのまま書き出す
+    # （再シリアライズしないことでdumpsのコストを丸ごと省く）
+    if simdjson is not None:
+        # Parserを1つだけ作って全行で使い回す（内部バッファが再利用される）
+        loads = simdjson.Parser().parse
+    elif orjson is not None:
+        loads = orjson.loads
+    else:
+        loads = json.loads
+
+    # UTF-8以外はバイト単位の行分割が使えない（UTF-16などは改行が
+    # 0x0A単独のバイトにならない）ため、テキストモードで読み書きする
+    # 検証器はUTF-8のバイト列を前提とするので行ごとにエンコードして渡す
+    if codecs.lookup(encoding).name not in ("utf-8", "ascii"):
+        with in_path.open("r", encoding=encoding) as fin, \
+             out_path.open("w", encoding=encoding, newline="") as fout:
+
+            for line_no, raw_line in enumerate(fin, start=1):
+                text = raw_line.strip()
+                if not text:
+                    continue  # 空行スキップ
+
+                try:
+                    loads(text.encode("utf-8"))
+                except ValueError:
+                    invalid += 1
+                    continue
+
+                fout.write(text)
+                fout.write("\n")
+                valid += 1
+
+        print(f"Valid lines : {valid}")
+        print(f"Invalid lines: {invalid}")
+        return
+
+    with in_path.open("rb") as fin, \
+         out_path.open("wb") as fout:
 
-        for line_no, line in enumerate(fin, start=1):
-            text = line.strip()
+        for line_no, raw_line in enumerate(fin, start=1):
+            text = raw_line.strip()
             if not text:
                 continue  # 空行スキップ
 
             try:
-                obj = json.loads(text)
-            except json.JSONDecodeError:
+                loads(text)
+            except ValueError:
+                # json.JSONDecodeError / orjson.JSONDecodeError / simdjsonのエラーは
+                # いずれもValueErrorのサブクラス
                 invalid += 1
                 # 問題のある行番号を見たい場合はコメントアウトを外す
                 # print(f"Invalid JSON at line {line_no}")
                 continue
 
-            fout.write(json.dumps(obj, ensure_ascii=False) + "\n")
+            fout.write(text)
+            fout.write(b"\n")
             valid += 1
 
     print(f"Valid lines : {valid}")
@@ -42,4 +97,4 @@ if __name__ == "__main__":
     input_path = "/Users/fukudakazufumi/Library/CloudStorage/OneDrive-学校法人立命館/Codes/agm_image/output_cleaned_1212.jsonl"
     output_path = "/Users/fukudakazufumi/Library/CloudStorage/OneDrive-学校法人立命館/Codes/agm_image/output_cleaned_1212_valid.jsonl"
 
-    make_valid_jsonl(input_path, output_path)
\ No newline at end of file
+    make_valid_jsonl(input_path, output_path)
@@ -2,6 +2,8 @@ import os
 import json
 import time
 import io
+import threading
+from concurrent.futures import ThreadPoolExecutor, as_completed
 from google_auth_oauthlib.flow import InstalledAppFlow
 from googleapiclient.discovery import build
 from googleapiclient.errors import HttpError
@@ -21,16 +23,39 @@ SCOPES = [
     'https://www.googleapis.com/auth/documents.readonly'
 ]
 
+# 並列ワーカー数（APIレート制限とのバランスで調整）
+MAX_WORKERS = 8
+
+
+class RateLimiter:
+    """
+    全ワーカーで共有する簡易レートリミッタ
+    API制限（1分間に1800回）を超えないよう、画像1枚あたり約5回の
+    API呼び出しを見込んで処理開始の間隔を空ける
+    """
+    def __init__(self, min_interval=0.2):
+        self.min_interval = min_interval
+        self._lock = threading.Lock()
+        self._next_time = 0.0
+
+    def wait(self):
+        with self._lock:
+            now = time.monotonic()
+            delay = self._next_time - now
+            self._next_time = max(now, self._next_time) + self.min_interval
+        if delay > 0:
+            time.sleep(delay)
+
 def compress_image_if_needed(drive_service, image_id, image_name, file_size):
     """
     画像が大きすぎる場合に圧縮する関数
     """
     if not Image or file_size <= 6000000:  # PILが利用できない、または6MB以下の場合はそのまま返す
         return image_id, False
-    
+
     try:
         print(f"画像を圧縮中: {image_name} ({file_size:,} bytes)")
-        
+
         # 元の画像をダウンロード
         file_content = drive_service.files().get_media(fileId=image_id).execute()
         
@@ -131,29 +156,46 @@ def main():
             return
 
         print(f"{len(items)}個のJPEG画像が見つかりました。処理を開始します...")
-        jsonl_data = []
 
-        for index, item in enumerate(items, 1):
+        # ネットワーク待ちが支配的なため、画像ごとのパイプライン
+        # （メタデータ取得→圧縮→OCR変換→テキスト抽出→削除）をスレッドプールで並列実行する
+        limiter = RateLimiter()
+        thread_local = threading.local()
+
+        def get_services():
+            # googleapiclientのserviceオブジェクトはスレッドセーフでないため
+            # スレッドごとに作成して使い回す
+            if not hasattr(thread_local, 'drive'):
+                thread_local.drive = build('drive', 'v3', credentials=creds)
+                thread_local.docs = build('docs', 'v1', credentials=creds)
+            return thread_local.drive, thread_local.docs
+
+        def process_image(index, item):
+            """1枚の画像をOCR処理して結果レコードを返すワーカー関数"""
             image_name = item['name']
             image_id = item['id']
+            limiter.wait()
             print(f"処理中 ({index}/{len(items)}): {image_name}")
 
-            # ★★★ 修正箇所 ★★★
+            drive_service, docs_service = get_services()
+            processing_image_id = image_id
+            is_compressed = False
+
             # ファイルサイズを事前にチェック
             try:
                 # ファイルのメタデータを取得してサイズをチェック
                 file_metadata = drive_service.files().get(
                     fileId=image_id, fields='size'
                 ).execute()
-                
+
                 file_size = int(file_metadata.get('size', 0))
                 print(f"ファイルサイズ: {file_size:,} bytes")
-                
+
                 # 画像圧縮を試行（必要に応じて）
                 processing_image_id, is_compressed = compress_image_if_needed(
                     drive_service, image_id, image_name, file_size
                 )
-                
+
                 # 圧縮後もサイズが大きすぎる場合はスキップ
                 if is_compressed:
                     # 圧縮されたファイルのサイズを再チェック
@@ -161,32 +203,30 @@ def main():
                         fileId=processing_image_id, fields='size'
                     ).execute()
                     compressed_size = int(compressed_metadata.get('size', 0))
-                    
+
                     if compressed_size > 6000000:
                         # 圧縮してもまだ大きすぎる場合
                         drive_service.files().delete(fileId=processing_image_id).execute()
                         skip_message = f"スキップ: 圧縮後もファイルサイズが大きすぎます ({compressed_size:,} bytes > 6MB制限)"
                         print(skip_message)
-                        jsonl_data.append({
+                        return {
                             "image_filename": image_name,
                             "extracted_text": skip_message
-                        })
-                        continue
+                        }
                 elif file_size > 6000000:
                     # 圧縮できず、元のファイルが大きすぎる場合
                     skip_message = f"スキップ: ファイルサイズが大きすぎます ({file_size:,} bytes > 6MB制限)"
                     print(skip_message)
-                    jsonl_data.append({
+                    return {
                         "image_filename": image_name,
                         "extracted_text": skip_message
-                    })
-                    continue
-                
+                    }
+
                 print("処理を続行します")
-                
+
             except Exception as e:
                 print(f"ファイルサイズ取得エラー: {e} - 処理を続行します")
-            
+
             # ファイルごとの処理をtry...exceptで囲み、エラーを捕捉する
             try:
                 # 画像をGoogleドキュメントに変換（OCR実行）
@@ -201,7 +241,7 @@ def main():
                 # Googleドキュメントからテキストを抽出
                 doc = docs_service.documents().get(documentId=doc_id).execute()
                 doc_content = doc.get('body').get('content')
-                
+
                 text = ''
                 if doc_content:
                     for value in doc_content:
@@ -210,62 +250,63 @@ def main():
                             for elem in elements:
                                 if 'textRun' in elem:
                                     text += elem.get('textRun').get('content')
-                
-                jsonl_data.append({
-                    "image_filename": image_name,
-                    "extracted_text": text.strip()
-                })
-                
+
                 # 一時的に作成したGoogleドキュメントを削除
                 drive_service.files().delete(fileId=doc_id).execute()
-                
+
                 # 圧縮されたファイルがある場合は削除
                 if is_compressed:
                     try:
                         drive_service.files().delete(fileId=processing_image_id).execute()
                     except Exception as e:
                         print(f"圧縮ファイル削除エラー: {e}")
-                
+
                 print(f"完了 ({index}/{len(items)}): {image_name} のテキストを抽出しました。")
-                
-                # API制限を考慮して適切な間隔を設ける（1分間に1800回制限 = 約0.033秒間隔）
-                # 安全のため0.1秒間隔で処理
-                time.sleep(0.1)
+
+                return {
+                    "image_filename": image_name,
+                    "extracted_text": text.strip()
+                }
 
             except HttpError as error:
                 # HttpErrorを捕捉し、特に413エラー(Request Too Large)の場合の処理を記述
                 if error.resp.status == 413:
                     error_message = "エラー: ファイルが大きすぎるため処理できませんでした。"
-                    print(error_message)
-                    jsonl_data.append({
-                        "image_filename": image_name,
-                        "extracted_text": error_message
-                    })
                 else:
                     # その他のAPIエラー
                     error_message = f"エラー: APIエラーが発生しました。 {error}"
-                    print(error_message)
-                    jsonl_data.append({
-                        "image_filename": image_name,
-                        "extracted_text": error_message
-                    })
+                print(error_message)
+                return {
+                    "image_filename": image_name,
+                    "extracted_text": error_message
+                }
             except Exception as e:
                 # その他の一般的なエラー
                 error_message = f"エラー: 予期せぬエラーが発生しました。 {e}"
                 print(error_message)
-                jsonl_data.append({
+                return {
                     "image_filename": image_name,
                     "extracted_text": error_message
-                })
-            # ★★★ ここまで ★★★
+                }
 
-        # JSONLファイルに出力
-        with open('output.jsonl', 'w', encoding='utf-8') as jsonlfile:
-            for data in jsonl_data:
-                jsonlfile.write(json.dumps(data, ensure_ascii=False) + '\n')
+        # 結果を溜め込まず、完了したものから逐次JSONLに書き出す
+        # （メモリ使用量を画像枚数に依存させず、途中クラッシュ時も結果が残る）
+        processed_count = 0
+        with open('output.jsonl', 'w', encoding='utf-8', buffering=1 << 20) as jsonlfile, \
+             ThreadPoolExecutor(max_workers=MAX_WORKERS) as executor:
+            futures = [
+                executor.submit(process_image, index, item)
+                for index, item in enumerate(items, 1)
+            ]
+            for future in as_completed(futures):
+                jsonlfile.write(json.dumps(future.result(), ensure_ascii=False) + '\n')
+                processed_count += 1
+                # 一定件数ごとにフラッシュしてディスクに確定させる
+                if processed_count % 50 == 0:
+                    jsonlfile.flush()
 
         print(f"\n全ての処理が完了しました。")
-        print(f"処理済みファイル数: {len(jsonl_data)}/{len(items)}")
+        print(f"処理済みファイル数: {processed_count}/{len(items)}")
         print(f"結果ファイル: 'output.jsonl'")
 
     except Exception as e:
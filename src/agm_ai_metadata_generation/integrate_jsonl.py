@@ -6,14 +6,33 @@ JSONLファイルを統合するスクリプト
 - CSVからinstanceIDを追加
 """
 
+import io
 import json
 import csv
+import hashlib
+import mmap
+import multiprocessing
+import os
+import sys
 import requests
+from requests.adapters import HTTPAdapter, Retry
 from pathlib import Path
 from collections import defaultdict
-from typing import Dict, List, Any, Set
+from concurrent.futures import ThreadPoolExecutor
+from dataclasses import dataclass, field
+from typing import Dict, Iterator, List, Any, Set, Tuple
 from urllib.parse import urlencode
 
+try:
+    import orjson
+except ImportError:
+    orjson = None
+
+try:
+    import polars as pl
+except ImportError:
+    pl = None
+
 # CSV列名マッピング（entity type → ag:プレフィックス付き列名）
 COLUMN_NAME_MAPPING = {
     "instanceID": "o:id",
@@ -54,6 +73,16 @@ COLUMN_NAME_MAPPING = {
 }
 
 
+# これ以上のサイズの入力JSONLはマルチプロセスで分割パースする
+PARALLEL_PARSE_MIN_BYTES = 64 * 1024 * 1024
+
+# sectionsのtype（CSVの列から除外する、大文字小文字を区別しない）
+SECTION_TYPES_LOWER = frozenset({
+    "catchphrase", "instruction", "meta", "rights", "safety_warning",
+    "components", "credit", "immersion"
+})
+
+
 def map_column_name(column_name: str) -> str:
     """列名をマッピングに従って変換"""
     return COLUMN_NAME_MAPPING.get(column_name, column_name)
@@ -61,13 +90,80 @@ def map_column_name(column_name: str) -> str:
 
 def extract_id_from_source(source: str) -> str:
     """sourceフィールドからハイフンの前のIDを抽出"""
-    if "-" in source:
-        return source.split("-")[0]
-    # ハイフンがない場合は拡張子を除いた部分を返す
-    return Path(source).stem
+    # partitionは1回の走査で済み、splitのような全要素リストを作らない
+    head, sep, _ = source.partition("-")
+    if sep:
+        return head
+    # ハイフンがない場合は拡張子を除いた部分を返す（Path生成を省く）
+    dot = source.rfind(".")
+    return source[:dot] if dot > 0 else source
+
 
+def strip_sparql_term(term: str) -> str:
+    """SPARQLのTSV結果の項からURIの<>やリテラルの引用符・型/言語タグを外す"""
+    if term.startswith("<") and term.endswith(">"):
+        return term[1:-1]
+    if term.startswith('"'):
+        # "値"^^<型> や "値"@ja の形式から値部分だけ取り出す
+        end = term.rfind('"')
+        if end > 0:
+            return term[1:end].replace('\\"', '"')
+    return term
+
+
+def iter_sparql_tsv_rows(response, column_names: List[str]):
+    """SPARQLのTSVレスポンスを行単位でパースし、指定列の値のタプルをyieldする
+
+    JSON形式のようにレスポンス全体を入れ子のdictに展開せず、
+    1行ずつ読み捨てながら必要な列だけ取り出す。
+    """
+    lines = response.iter_lines()
+    header = next(lines, None)
+    if header is None:
+        return
+
+    # ヘッダは「?itemID\t?instanceID」のように変数名が並ぶ
+    names = [n.lstrip("?") for n in header.decode("utf-8").split("\t")]
+    try:
+        indexes = [names.index(name) for name in column_names]
+    except ValueError:
+        # 想定した列が見つからない場合、位置で推測すると別の変数の値を
+        # 読み込んでしまうため（例: ?ttgのURIをoidとして扱う）、
+        # 警告を出して空の結果として扱う
+        print(f"警告: TSVヘッダに想定した列が見つかりません: {names} (要求: {column_names})")
+        return
 
-def load_id_instance_mapping(sparql_endpoint: str) -> Dict[str, str]:
+    min_cols = max(indexes) + 1
+    for raw_line in lines:
+        if not raw_line:
+            continue
+        cols = raw_line.decode("utf-8").split("\t")
+        if len(cols) < min_cols:
+            continue
+        yield tuple(strip_sparql_term(cols[i]) for i in indexes)
+
+
+def create_sparql_session() -> requests.Session:
+    """SPARQLエンドポイント向けの接続プーリング付きセッションを作成
+
+    keep-aliveで接続を使い回すことで、同一エンドポイントへの
+    2回目以降のクエリでTCP+TLSハンドシェイクを省略できる。
+    """
+    session = requests.Session()
+    adapter = HTTPAdapter(
+        pool_connections=2,
+        pool_maxsize=4,
+        max_retries=Retry(total=3, backoff_factor=0.5),
+    )
+    session.mount("https://", adapter)
+    session.mount("http://", adapter)
+    return session
+
+
+def load_id_instance_mapping(
+    sparql_endpoint: str,
+    session: requests.Session = None,
+) -> Dict[str, str]:
     """SPARQLエンドポイントからitemIDとinstanceIDのマッピングを取得。
 
     SPARQLから何も取得できなかった場合は、ローカルCSV `ref/oid_and_itemID.csv`
@@ -89,33 +185,33 @@ def load_id_instance_mapping(sparql_endpoint: str) -> Dict[str, str]:
 """
     
     headers = {
-        'Accept': 'application/sparql-results+json',
+        'Accept': 'text/tab-separated-values',
         'Content-Type': 'application/x-www-form-urlencoded'
     }
-    
+
     data = {'query': sparql_query}
-    
+
     mapping = {}
-    
+
+    http = session if session is not None else requests
+
     try:
         print(f"SPARQLエンドポイントからIDマッピングを取得中: {sparql_endpoint}")
-        response = requests.post(
+        response = http.post(
             sparql_endpoint,
             headers=headers,
             data=urlencode(data),
             timeout=30
         )
         response.raise_for_status()
-        
-        result = response.json()
-        
-        if 'results' in result and 'bindings' in result['results']:
-            for binding in result['results']['bindings']:
-                if 'itemID' in binding and 'instanceID' in binding:
-                    item_id = binding['itemID'].get('value', '')
-                    instance_id = binding['instanceID'].get('value', '')
-                    if item_id and instance_id:
-                        mapping[item_id] = instance_id
+
+        # TSVをストリームで1行ずつパースする（JSONの全体展開を避ける）
+        for item_id, instance_id in iter_sparql_tsv_rows(
+            response, ["itemID", "instanceID"]
+        ):
+            if item_id and instance_id:
+                # internしておくと以降の照合がポインタ比較の早道に乗る
+                mapping[sys.intern(item_id)] = sys.intern(instance_id)
 
         if mapping:
             print(f"IDマッピングを {len(mapping)} 件取得しました（SPARQL）")
@@ -136,14 +232,24 @@ def load_id_instance_mapping(sparql_endpoint: str) -> Dict[str, str]:
                 return {}
 
             try:
-                csv_mapping: Dict[str, str] = {}
-                with csv_path.open("r", encoding="utf-8") as f:
-                    reader = csv.DictReader(f)
-                    for row in reader:
-                        item_id = row.get("id", "").strip('"')
-                        instance_id = row.get("instanceID", "").strip('"')
-                        if item_id and instance_id:
-                            csv_mapping[item_id] = instance_id
+                with csv_path.open("r", encoding="utf-8", newline="") as f:
+                    reader = csv.reader(f)
+                    header = next(reader, [])
+                    try:
+                        id_idx = header.index("id")
+                        inst_idx = header.index("instanceID")
+                    except ValueError:
+                        print(f"警告: フォールバック用CSVにid / instanceID列がありません: {csv_path}")
+                        return {}
+
+                    # DictReaderの行ごとのdict生成を省き、列位置で直接読む
+                    # （引用符はcsv.readerが外すため、strip('\"')は不要）
+                    min_cols = max(id_idx, inst_idx) + 1
+                    csv_mapping: Dict[str, str] = {
+                        sys.intern(row[id_idx]): sys.intern(row[inst_idx])
+                        for row in reader
+                        if len(row) >= min_cols and row[id_idx] and row[inst_idx]
+                    }
 
                 print(f"IDマッピングを {len(csv_mapping)} 件取得しました（CSVフォールバック）")
                 sample_keys = list(csv_mapping.keys())[:10]
@@ -159,62 +265,141 @@ def load_id_instance_mapping(sparql_endpoint: str) -> Dict[str, str]:
         return {}
 
 
+def _text_digest(text: str) -> bytes:
+    """cleaned_text重複チェック用の16バイトダイジェストを生成
+
+    本文そのものをseen集合に持たせないことで、数KB級のテキストでも
+    集合が保持するのは1件あたり16バイトで済む。
+    """
+    return hashlib.blake2b(text.encode("utf-8"), digest_size=16).digest()
+
+
+def _join_text_parts(unique_texts: List[str]) -> str:
+    """重複除去済みのテキスト断片を空行区切りで結合"""
+    if len(unique_texts) > 64:
+        # 断片が非常に多い場合はStringIOへ逐次書き込んでから1回で文字列化する
+        buf = io.StringIO()
+        buf_write = buf.write
+        buf_write(unique_texts[0])
+        for text in unique_texts[1:]:
+            buf_write("\n\n")
+            buf_write(text)
+        return buf.getvalue()
+
+    return "\n\n".join(unique_texts)
+
+
 def merge_cleaned_texts(texts: List[str]) -> str:
     """複数のcleaned_textを統合（重複を避ける）"""
-    # 空文字列を除外
-    non_empty_texts = [t for t in texts if t.strip()]
-    if not non_empty_texts:
-        return ""
-    
-    # 重複を避けて結合
-    seen = set()
-    unique_texts = []
-    for text in non_empty_texts:
-        if text not in seen:
-            seen.add(text)
-            unique_texts.append(text)
-    
-    return "\n\n".join(unique_texts)
+    # 空文字列の除外と重複除去を1パスで行う
+    # （ホットループなのでメソッド参照をローカルに束縛しておく）
+    seen: Set[bytes] = set()
+    seen_add = seen.add
+    unique_texts: List[str] = []
+    unique_append = unique_texts.append
 
+    for text in texts:
+        # 重複チェックを先にすることで、重複分のstrip()を省く
+        digest = _text_digest(text)
+        if digest not in seen:
+            seen_add(digest)
+            if text.strip():
+                unique_append(text)
+
+    return _join_text_parts(unique_texts)
+
+
+def _normalize_entity_texts(entities: List[Dict[str, Any]]) -> None:
+    """entityのtextを読み込み時に一度だけstripして正規化する
+
+    以降のmerge_entities / MergedState.addはstrip済みを前提にできるため、
+    同じentityに対してstripが複数回走ることがなくなる。
+    """
+    for entity in entities:
+        # textがNoneの場合（polars読み込みでの欠損補完など）も空文字に揃える
+        entity["text"] = (entity.get("text") or "").strip()
+
+
+def merge_entities(
+    entities_list: List[List[Dict[str, Any]]],
+) -> Tuple[List[Dict[str, Any]], Dict[str, List[str]]]:
+    """複数のentitiesリストを統合（typeごとに値を集約）
+
+    統合済みentityのリストと、type → ユニークなtextのリスト（出現順）の
+    マッピングを返す。後者はCSV出力でそのまま列の値に使える。
+    """
+    # (type, text)のタプルをキーに、最初に出現したentityだけを残す
+    # タプルキーなのでtextにコロンが含まれていても曖昧にならない
+    seen: Dict[Tuple[str, str], Dict[str, Any]] = {}
+    seen_setdefault = seen.setdefault
 
-def merge_entities(entities_list: List[List[Dict[str, Any]]]) -> List[Dict[str, Any]]:
-    """複数のentitiesリストを統合（typeごとに値を集約）"""
-    # typeごとに値を集約
-    entities_by_type: Dict[str, Set[str]] = defaultdict(set)
-    all_entities = []
-    
     for entities in entities_list:
         for entity in entities:
-            entity_type = entity.get("type", "")
-            entity_text = entity.get("text", "").strip()
-            
+            # textは_normalize_entity_textsでstrip済み
+            entity_text = entity.get("text", "")
             if entity_text:
-                # 同じtypeとtextの組み合わせを避ける
-                key = f"{entity_type}:{entity_text}"
-                if key not in entities_by_type[entity_type]:
-                    entities_by_type[entity_type].add(key)
-                    all_entities.append(entity)
-    
-    return all_entities
+                seen_setdefault((entity.get("type", ""), entity_text), entity)
 
+    entities_by_type: Dict[str, List[str]] = defaultdict(list)
+    for entity_type, entity_text in seen:
+        if entity_type:
+            entities_by_type[entity_type].append(entity_text)
+
+    return list(seen.values()), dict(entities_by_type)
+
+
+def _dumps_jsonl_line(obj: Dict[str, Any]) -> bytes:
+    """オブジェクトをJSONL1行分のUTF-8バイト列（改行込み）に変換"""
+    if orjson is not None:
+        # orjsonは改行の付与までC側で行い、UTF-8バイト列を直接返す
+        return orjson.dumps(obj, option=orjson.OPT_APPEND_NEWLINE)
+    return (json.dumps(obj, ensure_ascii=False) + "\n").encode("utf-8")
+
+
+def _section_key(section: Dict[str, Any]) -> Any:
+    """sectionの内容から重複チェック用のハッシュ可能キーを生成
+
+    値がすべてハッシュ可能な浅いdict（よくあるケース）はタプル化だけで
+    済ませ、入れ子構造を含む場合のみ正規化JSONの16バイトダイジェストに
+    落とす。ダイジェストならseen集合の保持サイズはsectionの大きさに
+    よらず一定になる。
+    """
+    try:
+        key = tuple(sorted(section.items()))
+        hash(key)  # 値にlist/dictが含まれるとここでTypeError
+        return key
+    except TypeError:
+        # 入れ子構造を含む場合はJSONシリアライズ経由でキー化する
+        pass
+
+    if orjson is not None:
+        blob = orjson.dumps(section, option=orjson.OPT_SORT_KEYS)
+    else:
+        blob = json.dumps(section, sort_keys=True, ensure_ascii=False).encode("utf-8")
+    return hashlib.blake2b(blob, digest_size=16).digest()
+
+
+def merge_sections(sections_list: List[List[Dict[str, Any]]]) -> Iterator[Dict[str, Any]]:
+    """複数のsectionsリストを統合（重複を避ける）
+
+    統合結果のリストを作らず、ユニークなsectionを1件ずつyieldする。
+    リストとして受け取りたい場合は呼び出し側で list(...) に包むこと。
+    """
+    seen: Set[bytes] = set()
 
-def merge_sections(sections_list: List[List[Dict[str, Any]]]) -> List[Dict[str, Any]]:
-    """複数のsectionsリストを統合（重複を避ける）"""
-    seen = set()
-    merged_sections = []
-    
     for sections in sections_list:
         for section in sections:
             # sectionの内容で重複チェック
-            section_key = json.dumps(section, sort_keys=True, ensure_ascii=False)
+            section_key = _section_key(section)
             if section_key not in seen:
                 seen.add(section_key)
-                merged_sections.append(section)
-    
-    return merged_sections
+                yield section
 
 
-def get_existing_metadata_oids(sparql_endpoint: str) -> Set[str]:
+def get_existing_metadata_oids(
+    sparql_endpoint: str,
+    session: requests.Session = None,
+) -> Set[str]:
     """
     SPARQLエンドポイントから、既に人間が作成したメタデータのoidを取得
     count(?o) >= 15 のoidを返す
@@ -237,33 +422,32 @@ HAVING (COUNT(?o) >= 15)
 """
     
     headers = {
-        'Accept': 'application/sparql-results+json',
+        'Accept': 'text/tab-separated-values',
         'Content-Type': 'application/x-www-form-urlencoded'
     }
-    
+
     data = {'query': sparql_query}
-    
+
+    http = session if session is not None else requests
+
     try:
         print(f"SPARQLエンドポイントにクエリを送信中: {sparql_endpoint}")
-        response = requests.post(
+        response = http.post(
             sparql_endpoint,
             headers=headers,
             data=urlencode(data),
             timeout=30
         )
         response.raise_for_status()
-        
-        result = response.json()
+
         oids = set()
-        
-        if 'results' in result and 'bindings' in result['results']:
-            for binding in result['results']['bindings']:
-                if 'oid' in binding and 'value' in binding['oid']:
-                    oid = binding['oid']['value']
-                    count = binding.get('count', {}).get('value', '0')
-                    oids.add(oid)
-                    print(f"  既存メタデータ発見: oid={oid}, count={count}")
-        
+
+        # TSVをストリームで1行ずつパースする（JSONの全体展開を避ける）
+        # 1件ごとのprintは大量の結果で支配的なコストになるため行わない
+        for (oid,) in iter_sparql_tsv_rows(response, ["oid"]):
+            if oid:
+                oids.add(sys.intern(oid))
+
         print(f"既存メタデータのoid数: {len(oids)}")
         return oids
         
@@ -273,6 +457,238 @@ HAVING (COUNT(?o) >= 15)
         return set()
 
 
+@dataclass
+class MergedState:
+    """1つのIDに属する行を読み込みながら統合していく累積状態
+
+    入力全体をグループ化して保持する代わりに、行を読むそばから
+    この状態へ畳み込むことで、ピークメモリをID数×統合後サイズに抑える。
+    """
+    # seen_textsは本文ではなく16バイトダイジェストを保持する
+    seen_texts: Set[bytes] = field(default_factory=set)
+    text_parts: List[str] = field(default_factory=list)
+    entity_seen: Dict[Tuple[str, str], Dict[str, Any]] = field(default_factory=dict)
+    sources: List[str] = field(default_factory=list)
+
+    def add(self, cleaned_text: str, entities: List[Dict[str, Any]], source: str) -> None:
+        """1行分のフィールドを統合状態に畳み込む"""
+        # cleaned_textを統合（merge_cleaned_textsと同じ規則）
+        digest = _text_digest(cleaned_text)
+        if digest not in self.seen_texts:
+            self.seen_texts.add(digest)
+            if cleaned_text.strip():
+                self.text_parts.append(cleaned_text)
+
+        # entitiesを統合（merge_entitiesと同じ規則）
+        entity_setdefault = self.entity_seen.setdefault
+        for entity in entities:
+            # textは_normalize_entity_textsでstrip済み
+            entity_text = entity.get("text", "")
+            if entity_text:
+                entity_setdefault((entity.get("type", ""), entity_text), entity)
+
+        self.sources.append(source)
+
+    def merge(self, other: "MergedState") -> None:
+        """別プロセスで作られた同じIDの統合状態を後ろに連結する"""
+        for text in other.text_parts:
+            if _text_digest(text) not in self.seen_texts:
+                self.text_parts.append(text)
+        self.seen_texts |= other.seen_texts
+
+        entity_setdefault = self.entity_seen.setdefault
+        for key, entity in other.entity_seen.items():
+            entity_setdefault(key, entity)
+
+        self.sources.extend(other.sources)
+
+    def entities_by_type(self) -> Dict[str, List[str]]:
+        """type → ユニークなtextのリスト（出現順）を返す"""
+        by_type: Dict[str, List[str]] = defaultdict(list)
+        for entity_type, entity_text in self.entity_seen:
+            if entity_type:
+                by_type[entity_type].append(entity_text)
+        return dict(by_type)
+
+
+def _compute_chunk_offsets(path: str, num_chunks: int) -> List[Tuple[int, int]]:
+    """ファイルを改行境界に揃えたバイト範囲に分割する"""
+    size = os.path.getsize(path)
+    if size == 0:
+        return []
+
+    chunk_size = max(size // num_chunks, 1)
+    offsets = []
+    with open(path, "rb") as f:
+        start = 0
+        while start < size:
+            end = min(start + chunk_size, size)
+            if end < size:
+                # 次の改行まで境界を延ばす
+                f.seek(end)
+                f.readline()
+                end = f.tell()
+            offsets.append((start, end))
+            start = end
+    return offsets
+
+
+def _scan_jsonl_chunk(path: str, start: int, end: int) -> Tuple[Dict[str, MergedState], int, int]:
+    """指定バイト範囲の行をパースしてIDごとのMergedStateに畳み込む
+
+    ワーカープロセスで実行される。戻り値は
+    (states, JSON解析エラー行数, sourceなし行数)。
+    """
+    states: Dict[str, MergedState] = {}
+    invalid_lines = 0
+    missing_source_lines = 0
+    loads = orjson.loads if orjson is not None else json.loads
+
+    with open(path, "rb") as f:
+        f.seek(start)
+        remaining = end - start
+        while remaining > 0:
+            raw_line = f.readline()
+            if not raw_line:
+                break
+            remaining -= len(raw_line)
+
+            line = raw_line.strip()
+            if not line:
+                continue
+
+            try:
+                obj = loads(line)
+            except ValueError:
+                invalid_lines += 1
+                continue
+
+            source = obj.get("source", "")
+            if not source:
+                missing_source_lines += 1
+                continue
+
+            obj_id = sys.intern(extract_id_from_source(source))
+            state = states.get(obj_id)
+            if state is None:
+                state = states[obj_id] = MergedState()
+            entities = obj.get("entities", [])
+            _normalize_entity_texts(entities)
+            state.add(
+                obj.get("cleaned_text", ""),
+                entities,
+                source,
+            )
+
+    return states, invalid_lines, missing_source_lines
+
+
+def load_states_parallel(input_jsonl_path: str) -> Dict[str, MergedState]:
+    """入力JSONLをバイト範囲で分割し、マルチプロセスでパース・統合する"""
+    num_procs = os.cpu_count() or 1
+    offsets = _compute_chunk_offsets(input_jsonl_path, num_procs)
+
+    with multiprocessing.Pool(processes=num_procs) as pool:
+        results = pool.starmap(
+            _scan_jsonl_chunk,
+            [(input_jsonl_path, start, end) for start, end in offsets],
+        )
+
+    # チャンクはファイル順なので、順に連結すれば逐次処理と同じ結果になる
+    states: Dict[str, MergedState] = {}
+    invalid_lines = 0
+    missing_source_lines = 0
+    for chunk_states, invalid, missing in results:
+        invalid_lines += invalid
+        missing_source_lines += missing
+        for obj_id, chunk_state in chunk_states.items():
+            state = states.get(obj_id)
+            if state is None:
+                states[obj_id] = chunk_state
+            else:
+                state.merge(chunk_state)
+
+    if invalid_lines:
+        print(f"警告: JSON解析エラーの行が {invalid_lines} 行ありました（スキップ）")
+    if missing_source_lines:
+        print(f"警告: sourceがない行が {missing_source_lines} 行ありました（スキップ）")
+
+    return states
+
+
+def integrate_objects_polars(
+    input_jsonl_path: str,
+) -> Tuple[List[Dict[str, Any]], Dict[str, Dict[str, List[str]]]]:
+    """polarsでJSONLを読み込み、ID抽出とグループ化をベクトル化して統合する。
+
+    JSONのパース・ID抽出・group_byがすべてネイティブ実装で実行される。
+    統合ルール自体は merge_cleaned_texts / merge_entities をそのまま使う。
+    """
+    df = pl.read_ndjson(input_jsonl_path)
+
+    if "source" not in df.columns or "entities" not in df.columns:
+        raise ValueError("source / entitiesフィールドが見つかりません")
+
+    # sourceがない行は従来どおりスキップ
+    missing = df.filter(
+        pl.col("source").is_null() | (pl.col("source") == "")
+    ).height
+    if missing:
+        print(f"警告: sourceがない行が {missing} 行ありました（スキップ）")
+        df = df.filter(
+            pl.col("source").is_not_null() & (pl.col("source") != "")
+        )
+
+    # extract_id_from_sourceと同じ規則を文字列式で適用
+    df = df.with_columns(
+        pl.when(pl.col("source").str.contains("-", literal=True))
+        .then(pl.col("source").str.split("-").list.get(0))
+        .otherwise(
+            # rfind(".")と同じく最後のドットまでを残す（ドットがない・先頭の
+            # 場合はsourceそのまま）。ディレクトリ部分も落とさない
+            pl.col("source").str.extract(r"^(.+)\.[^.]*$", 1)
+            .fill_null(pl.col("source"))
+        )
+        .alias("id")
+    )
+
+    agg_exprs = [pl.col("source").alias("sources"), pl.col("entities")]
+    if "cleaned_text" in df.columns:
+        agg_exprs.append(pl.col("cleaned_text"))
+
+    aggregated = df.group_by("id", maintain_order=True).agg(agg_exprs)
+
+    integrated_objects = []
+    entities_by_type_by_id: Dict[str, Dict[str, List[str]]] = {}
+    for row in aggregated.iter_rows(named=True):
+        cleaned_texts = [t for t in row.get("cleaned_text", []) if t]
+        entities_list = []
+        for entities in row["entities"]:
+            if not entities:
+                continue
+            # polarsはstructのフィールドを全行で統合するため、元の行に
+            # 無かったフィールドがNoneで補完される。Noneの項を落として
+            # 非polars経路と同じ形に戻す
+            cleaned = [
+                {k: v for k, v in entity.items() if v is not None}
+                for entity in entities
+                if entity is not None
+            ]
+            _normalize_entity_texts(cleaned)
+            entities_list.append(cleaned)
+        merged_entities, entities_by_type = merge_entities(entities_list)
+        entities_by_type_by_id[row["id"]] = entities_by_type
+        integrated_objects.append({
+            "id": row["id"],
+            "cleaned_text": merge_cleaned_texts(cleaned_texts),
+            "entities": merged_entities,
+            # 元のsource情報も保持（参考用）
+            "sources": row["sources"],
+        })
+
+    return integrated_objects, entities_by_type_by_id
+
+
 def integrate_jsonl(
     input_jsonl_path: str,
     output_jsonl_path: str,
@@ -280,96 +696,149 @@ def integrate_jsonl(
     sparql_endpoint: str = "https://dydra.com/fukudakz/agmsearchendpoint/sparql"
 ) -> None:
     """JSONLファイルを統合し、JSONLとCSVの両方を出力"""
-    
-    # 既存メタデータのoidを取得
-    existing_oids = get_existing_metadata_oids(sparql_endpoint)
-    
-    # SPARQLからIDマッピングを取得
-    id_to_instance = load_id_instance_mapping(sparql_endpoint)
-    
-    # IDごとにオブジェクトをグループ化
-    grouped: Dict[str, List[Dict[str, Any]]] = defaultdict(list)
-    
-    with open(input_jsonl_path, "r", encoding="utf-8") as f:
-        for line_no, line in enumerate(f, start=1):
-            line = line.strip()
-            if not line:
-                continue
-            
+
+    # 2つのSPARQLクエリで同じ接続プールを使い回しつつ並行実行し、
+    # 起動時のネットワーク待ちを1往復分に抑える
+    session = create_sparql_session()
+
+    with ThreadPoolExecutor(max_workers=2) as executor:
+        # 既存メタデータのoidを取得
+        oids_future = executor.submit(
+            get_existing_metadata_oids, sparql_endpoint, session
+        )
+        # SPARQLからIDマッピングを取得
+        mapping_future = executor.submit(
+            load_id_instance_mapping, sparql_endpoint, session
+        )
+        existing_oids = oids_future.result()
+        id_to_instance = mapping_future.result()
+
+    # polarsが使える場合はベクトル化したパスで統合し、
+    # 使えない・失敗した場合は従来のPython実装にフォールバック
+    integrated_objects = None
+    # merge_entitiesが返すtype → textリストのマッピング（CSV出力で再利用）
+    entities_by_type_by_id: Dict[str, Dict[str, List[str]]] = {}
+    if pl is not None:
+        try:
+            print("polarsで入力JSONLを統合中...")
+            integrated_objects, entities_by_type_by_id = \
+                integrate_objects_polars(input_jsonl_path)
+        except Exception as e:
+            print(f"警告: polarsでの統合に失敗しました: {e}")
+            print("従来のPython実装にフォールバックします")
+            integrated_objects = None
+
+    if integrated_objects is None:
+        # 大きな入力はマルチプロセスで分割パースする
+        # （パースはCPUバウンドで行単位に独立なため並列化が効く）
+        states: Dict[str, MergedState] = None
+        if (
+            (os.cpu_count() or 1) > 1
+            and os.path.getsize(input_jsonl_path) >= PARALLEL_PARSE_MIN_BYTES
+        ):
             try:
-                obj = json.loads(line)
-                source = obj.get("source", "")
-                if not source:
-                    print(f"警告: 行 {line_no} にsourceがありません")
-                    continue
-                
-                # IDを抽出
-                obj_id = extract_id_from_source(source)
-                grouped[obj_id].append(obj)
-                
-            except json.JSONDecodeError as e:
-                print(f"警告: 行 {line_no} のJSON解析エラー: {e}")
-                continue
-    
-    print(f"{len(grouped)} 個のユニークなIDが見つかりました")
-    
-    # 統合されたオブジェクトを作成
-    integrated_objects = []
-    
-    for obj_id, objects in grouped.items():
-        # cleaned_textを統合
-        cleaned_texts = [obj.get("cleaned_text", "") for obj in objects]
-        merged_cleaned_text = merge_cleaned_texts(cleaned_texts)
-        
-        # entitiesを統合
-        entities_list = [obj.get("entities", []) for obj in objects]
-        merged_entities = merge_entities(entities_list)
-        
+                print(f"{os.cpu_count()}プロセスで入力JSONLをパース中...")
+                states = load_states_parallel(input_jsonl_path)
+            except Exception as e:
+                print(f"警告: 並列パースに失敗しました: {e}")
+                print("逐次処理にフォールバックします")
+                states = None
+
+        if states is None:
+            # 行を読み込みながらIDごとのMergedStateへ直接畳み込む
+            # （入力全体をグループ化して保持する段階をなくす）
+            states = {}
+
+            # ファイルをmmapしてバイト列のまま行分割し、orjsonに直接渡す
+            # （テキストモードのUTF-8デコードとstr生成を省く）
+            loads = orjson.loads if orjson is not None else json.loads
+
+            with open(input_jsonl_path, "rb") as f:
+                try:
+                    mm = mmap.mmap(f.fileno(), 0, access=mmap.ACCESS_READ)
+                except ValueError:
+                    mm = f  # 空ファイルなどmmapできない場合はそのまま読む
+
+                try:
+                    for line_no, raw_line in enumerate(iter(mm.readline, b""), start=1):
+                        line = raw_line.strip()
+                        if not line:
+                            continue
+
+                        try:
+                            obj = loads(line)
+                        except ValueError as e:
+                            # json.JSONDecodeError / orjson.JSONDecodeErrorの両方を捕捉
+                            print(f"警告: 行 {line_no} のJSON解析エラー: {e}")
+                            continue
+
+                        source = obj.get("source", "")
+                        if not source:
+                            print(f"警告: 行 {line_no} にsourceがありません")
+                            continue
+
+                        # IDを抽出して統合状態を更新
+                        obj_id = sys.intern(extract_id_from_source(source))
+                        state = states.get(obj_id)
+                        if state is None:
+                            state = states[obj_id] = MergedState()
+                        entities = obj.get("entities", [])
+                        _normalize_entity_texts(entities)
+                        state.add(
+                            obj.get("cleaned_text", ""),
+                            entities,
+                            source,
+                        )
+                finally:
+                    if mm is not f:
+                        mm.close()
+
         # 統合されたオブジェクトを作成
-        integrated_obj = {
-            "id": obj_id,
-            "cleaned_text": merged_cleaned_text,
-            "entities": merged_entities
-        }
-        
-        # instanceIDを追加（CSVに存在する場合）
-        if obj_id in id_to_instance:
-            integrated_obj["instanceID"] = id_to_instance[obj_id]
+        integrated_objects = []
+
+        for obj_id, state in states.items():
+            entities_by_type_by_id[obj_id] = state.entities_by_type()
+            integrated_objects.append({
+                "id": obj_id,
+                "cleaned_text": _join_text_parts(state.text_parts),
+                "entities": list(state.entity_seen.values()),
+                # 元のsource情報も保持（参考用）
+                "sources": state.sources,
+            })
+
+    print(f"{len(integrated_objects)} 個のユニークなIDが見つかりました")
+
+    # instanceIDを追加（マッピングに存在する場合）
+    # あわせて既存メタデータ該当判定もここで1回だけ行い、
+    # JSONL/CSVの両方の出力ループで使い回す
+    existing_metadata_ids: Set[str] = set()
+    for integrated_obj in integrated_objects:
+        obj_id = integrated_obj["id"]
+        instance_id = id_to_instance.get(obj_id)
+        if instance_id is not None:
+            integrated_obj["instanceID"] = instance_id
+            if instance_id in existing_oids:
+                existing_metadata_ids.add(obj_id)
         else:
             print(f"警告: ID '{obj_id}' に対応するinstanceIDが見つかりませんでした")
-        
-        # 元のsource情報も保持（参考用）
-        sources = [obj.get("source", "") for obj in objects]
-        integrated_obj["sources"] = sources
-        
-        integrated_objects.append(integrated_obj)
     
-    # 統合されたオブジェクトをJSONLとして保存
-    with open(output_jsonl_path, "w", encoding="utf-8") as f:
+    # 統合されたオブジェクトをJSONLとして保存（UTF-8バイト列を直接書き出す）
+    with open(output_jsonl_path, "wb") as f:
         for obj in integrated_objects:
             # instanceIDが既存メタデータのoidと一致する場合はentitiesを除外
-            instance_id = obj.get("instanceID", "")
-            if instance_id and instance_id in existing_oids:
+            if obj["id"] in existing_metadata_ids:
                 # entitiesを除外したコピーを作成
-                obj_copy = obj.copy()
-                obj_copy["entities"] = []
                 # ag:catalogingDataStatusは空にする（JSONLには含めない）
-                f.write(json.dumps(obj_copy, ensure_ascii=False) + "\n")
+                f.write(_dumps_jsonl_line({**obj, "entities": []}))
             else:
-                f.write(json.dumps(obj, ensure_ascii=False) + "\n")
-    
-    # sectionsのtype（CSVの列から除外する、大文字小文字を区別しない）
-    section_types_lower = {
-        "catchphrase", "instruction", "meta", "rights", "safety_warning",
-        "components", "credit", "immersion"
-    }
-    
+                f.write(_dumps_jsonl_line(obj))
+
     # すべてのentity typeを収集（sectionsのtypeは除外）
     all_entity_types = set()
     for obj in integrated_objects:
         for entity in obj.get("entities", []):
             entity_type = entity.get("type", "")
-            if entity_type and entity_type.lower() not in section_types_lower:
+            if entity_type and entity_type.lower() not in SECTION_TYPES_LOWER:
                 all_entity_types.add(entity_type)
     
     # entity typeをソートして列順を固定
@@ -379,7 +848,7 @@ def integrate_jsonl(
     entities_excluded_count = 0
     
     # 統合されたオブジェクトをCSVとして保存（区切り文字: ,、多値結合: ||）
-    with open(output_csv_path, "w", encoding="utf-8", newline="") as f:
+    with open(output_csv_path, "w", encoding="utf-8", newline="", buffering=1 << 20) as f:
         # 基本フィールド + entity type列 + ag:catalogingDataStatus（最後の列）
         # 列名をマッピングに従って変換
         base_fieldnames = ["id", "instanceID", "cleaned_text", "sources"]
@@ -387,50 +856,57 @@ def integrate_jsonl(
         mapped_entity_columns = [map_column_name(et) for et in entity_type_columns]
         fieldnames = mapped_base_fieldnames + mapped_entity_columns + ["ag:catalogingDataStatus"]
         
-        writer = csv.DictWriter(f, fieldnames=fieldnames, quoting=csv.QUOTE_ALL)
-        writer.writeheader()
-        
+        # DictWriterは行ごとにfieldnames分のdict参照を行うため、
+        # 列順を固定したリストをそのまま書き込む
+        writer = csv.writer(f, quoting=csv.QUOTE_ALL)
+        writer.writerow(fieldnames)
+
+        # 行をある程度まとめてからwriterowsで書き込む
+        # （Python→Cの呼び出し回数を減らす）
+        row_buffer: List[List[str]] = []
+        chunk_size = 4096
+
+        # 空文字列で初期化したテンプレート行と、entity type → 列位置の索引を
+        # あらかじめ用意し、値のある列だけを埋める
+        # （行の大半が空列のため、全列を毎回組み立てるより速い）
+        row_template = [""] * len(fieldnames)
+        entity_col_index = {et: 4 + i for i, et in enumerate(entity_type_columns)}
+        status_idx = len(fieldnames) - 1
+
         for obj in integrated_objects:
             instance_id = obj.get("instanceID", "")
-            
+
             # instanceIDが既存メタデータのoidと一致する場合はentitiesとag:catalogingDataStatusを除外
-            is_existing_metadata = instance_id and instance_id in existing_oids
-            
-            # 基本フィールド（マッピング後の列名を使用）
-            row = {
-                "id": obj.get("id", ""),
-                map_column_name("instanceID"): instance_id,
-                map_column_name("cleaned_text"): obj.get("cleaned_text", ""),
-                map_column_name("sources"): "||".join(obj.get("sources", [])),
-                "ag:catalogingDataStatus": "" if is_existing_metadata else "収蔵品の写真を元にAIで自動生成した目録データです"
-            }
-            
+            is_existing_metadata = obj["id"] in existing_metadata_ids
+
+            # writerowsまで参照が残るため、テンプレートのコピーを行として使う
+            row = row_template[:]
+            row[0] = obj.get("id", "")
+            row[1] = instance_id
+            row[2] = obj.get("cleaned_text", "")
+            row[3] = "||".join(obj.get("sources", []))
+
             if is_existing_metadata:
+                # 既存メタデータのためentitiesを除外（cleaned_textは追加）
+                # entity列は空のまま、件数はループ後にまとめて表示する
                 entities_excluded_count += 1
-                print(f"entities除外: instanceID={instance_id} は既存メタデータのためentitiesを除外（cleaned_textは追加）")
-                # entitiesの列は全て空にする（マッピング後の列名を使用）
-                for entity_type in entity_type_columns:
-                    mapped_column = map_column_name(entity_type)
-                    row[mapped_column] = ""
             else:
-                # entitiesをtypeごとにグループ化
-                entities_by_type: Dict[str, List[str]] = defaultdict(list)
-                for entity in obj.get("entities", []):
-                    entity_type = entity.get("type", "")
-                    entity_text = entity.get("text", "").strip()
-                    if entity_type and entity_text:
-                        # 重複を避ける
-                        if entity_text not in entities_by_type[entity_type]:
-                            entities_by_type[entity_type].append(entity_text)
-                
-                # 各entity typeの値を||で結合（スペースなし、マッピング後の列名を使用）
-                for entity_type in entity_type_columns:
-                    mapped_column = map_column_name(entity_type)
-                    values = entities_by_type.get(entity_type, [])
-                    row[mapped_column] = "||".join(values) if values else ""
-            
-            writer.writerow(row)
-        
+                # merge_entitiesが構築済みのtype → textリストをそのまま使い、
+                # 各entity typeの値を||で結合（スペースなし）
+                for entity_type, texts in entities_by_type_by_id.get(obj["id"], {}).items():
+                    col = entity_col_index.get(entity_type)
+                    if col is not None:
+                        row[col] = "||".join(texts)
+                row[status_idx] = "収蔵品の写真を元にAIで自動生成した目録データです"
+
+            row_buffer.append(row)
+            if len(row_buffer) >= chunk_size:
+                writer.writerows(row_buffer)
+                row_buffer.clear()
+
+        if row_buffer:
+            writer.writerows(row_buffer)
+
         if entities_excluded_count > 0:
             print(f"既存メタデータのためentitiesを除外したオブジェクト数: {entities_excluded_count}")
     